@@ -1,7 +1,5 @@
 import cmd
 from datetime import date
-from typing import Optional
-from dateutil.relativedelta import relativedelta
 from tracker.logic import (
     add_budget_category,
     delete_budget_category,
@@ -12,17 +10,59 @@ from tracker.logic import (
     delete_transaction,
     delete_transactions_by_criteria
 )
-from tracker.storage import save_data, load_data, list_save_files
-from tracker.models import budget_categories, transactions, balance_history, Transaction
+from tracker.models import TRANSACTION_SIGN, budget_categories
+
+
+_RECUR_INTERVALS = frozenset(('daily', 'weekly', 'monthly', 'yearly'))
+_REPORT_TIMEFRAMES = {'--day': 'day', '--month': 'month', '--year': 'year'}
+
+
+def _filter_amount(filters, value):
+    filters['amount'] = float(value)
+
+
+def _filter_type(filters, value):
+    filters['t_type'] = value
+
+
+def _filter_from(filters, value):
+    start_date = date.fromisoformat(value)
+    filters['date_range'] = (start_date, filters['date_range'][1] if filters['date_range'] else date.max)
+
+
+def _filter_to(filters, value):
+    end_date = date.fromisoformat(value)
+    filters['date_range'] = (filters['date_range'][0] if filters['date_range'] else date.min, end_date)
+
+
+def _filter_category(filters, value):
+    filters['category_name'] = value
+
+
+_FILTER_HANDLERS = {
+    '--amount': _filter_amount,
+    '--type': _filter_type,
+    '--from': _filter_from,
+    '--to': _filter_to,
+    '--category': _filter_category,
+}
 
 
 class ExpenseTrackerCLI(cmd.Cmd):
     prompt = "(tracker) "
+    _names = None
 
     def __init__(self):
         super().__init__()
         self.intro = "Welcome to Expense Tracker. Type 'help' for commands."
 
+    def get_names(self):
+        # cmd.Cmd calls this (a full dir() of the class) on every help and
+        # completion, but the set of commands never changes at runtime.
+        if self._names is None:
+            self._names = super().get_names()
+        return self._names
+
     # ===== CORE COMMANDS =====
     def do_add(self, arg):
         """Add a transaction: add <amount> <income|expense> [category] [date=YYYY-MM-DD] [--recur <daily|weekly|monthly|yearly>] [--desc "description"]"""
@@ -48,8 +88,7 @@ class ExpenseTrackerCLI(cmd.Cmd):
             print(f"Error adding transaction: {e}")
 
     def do_balance(self, arg):
-        """Calculate projected balance up to specified date"""
-        """balance [YYYY-MM-DD]"""
+        """Calculate projected balance up to specified date: balance [YYYY-MM-DD]"""
         try:
             args = self._parse_date_args(arg)
             target_date = args['date']
@@ -87,24 +126,29 @@ class ExpenseTrackerCLI(cmd.Cmd):
         """
         try:
             args = self._parse_report_args(arg)
-            result = check_spending(**args)
+            result = check_spending(
+                day=args['day'],
+                month=args['month'],
+                year=args['year'],
+                include_categories=args['show_categories']
+            )
 
             # Print report header
-            timeframe = args.get('timeframe', 'day')
+            timeframe = result.timeframe
             print(f"\n{' ' + timeframe.capitalize() + ' Report ':-^50}")
-            print(f"Period: {result['target_date']}")
+            print(f"Period: {result.target_date}")
 
             # Print totals
             print(f"\nTotals:")
-            print(f"  Income:   ${result['totals']['income']:.2f}")
-            print(f"  Expenses: ${result['totals']['expense']:.2f}")
-            print(f"  Net:      ${result['totals']['net']:.2f}")
+            print(f"  Income:   ${result.totals.income:.2f}")
+            print(f"  Expenses: ${result.totals.expense:.2f}")
+            print(f"  Net:      ${result.totals.net:.2f}")
 
             # Print category breakdown if requested
             if args.get('show_categories'):
                 print("\nBy Category:")
-                for cat, data in result['categories'].items():
-                    print(f"  {cat}: ${data['net']:.2f} (Income: ${data['income']:.2f}, Expense: ${data['expense']:.2f})")
+                for cat, data in result.categories.items():
+                    print(f"  {cat}: ${data.net:.2f} (Income: ${data.income:.2f}, Expense: ${data.expense:.2f})")
 
         except Exception as e:
             print(f"Error generating report: {e}")
@@ -142,25 +186,14 @@ class ExpenseTrackerCLI(cmd.Cmd):
 
         i = 0
         while i < len(args):
-            if args[i] == "--amount":
-                filters['amount'] = float(args[i+1])
-                i += 2
-            elif args[i] == "--type":
-                filters['t_type'] = args[i+1]
-                i += 2
-            elif args[i] == "--from":
-                start_date = date.fromisoformat(args[i+1])
-                filters['date_range'] = (start_date, filters['date_range'][1] if filters['date_range'] else date.max)
-                i += 2
-            elif args[i] == "--to":
-                end_date = date.fromisoformat(args[i+1])
-                filters['date_range'] = (filters['date_range'][0] if filters['date_range'] else date.min, end_date)
-                i += 2
-            elif args[i] == "--category":
-                filters['category_name'] = args[i+1]
-                i += 2
-            else:
+            handler = _FILTER_HANDLERS.get(args[i])
+            if handler is None:
                 i += 1
+                continue
+            if i + 1 >= len(args):
+                raise ValueError(f"Missing value after {args[i]}")
+            handler(filters, args[i+1])
+            i += 2
 
         return delete_transactions_by_criteria(**filters)
 
@@ -169,7 +202,7 @@ class ExpenseTrackerCLI(cmd.Cmd):
         """Manage categories: category <add|list|delete> [name] [limit]"""
         args = arg.split()
         if not args:
-            self.help_category()
+            self.do_help("category")
             return
 
         try:
@@ -191,38 +224,56 @@ class ExpenseTrackerCLI(cmd.Cmd):
                 else:
                     print(f"Category not found: {args[1]}")
             else:
-                self.help_category()
+                self.do_help("category")
         except Exception as e:
             print(f"Error: {e}")
 
     # ===== DATA MANAGEMENT =====
     def do_save(self, arg):
-        """Save current data: save [name=default]"""
-        name = arg.strip() or "default"
-        save_data(name)
-        print(f"✓ Saved as '{name}'")
+        """Save current data: save [name=default] [more names...] [--pretty] [--compress]"""
+        from tracker.storage import save_data, save_data_batch
+
+        args = arg.split()
+        pretty = '--pretty' in args
+        compress = '--compress' in args
+        names = [name for name in args if name not in ('--pretty', '--compress')] or ["default"]
+        if len(names) > 1:
+            save_data_batch(names, pretty=pretty, compress=compress)
+        else:
+            save_data(names[0], pretty=pretty, compress=compress)
 
     def do_load(self, arg):
-        """Load saved data: load [name]"""
+        """Load saved data: load <name|number|prefix> (no argument lists the saves)"""
+        from tracker.storage import load_data, list_save_files, save_exists
+
+        name = arg.strip()
+        if name and save_exists(name):
+            load_data(name)
+            return
+
         saves = list_save_files()
         if not saves:
             print("No save files available")
             return
 
-        if not arg:
+        if not name:
             print("Available saves:")
-            for i, name in enumerate(saves, 1):
-                print(f"{i}. {name}")
-            try:
-                choice = int(input("Select save: ")) - 1
-                name = saves[choice]
-            except (ValueError, IndexError):
-                print("Invalid selection")
-                return
+            for i, save in enumerate(saves, 1):
+                print(f"{i}. {save}")
+            print("Use: load <name|number>")
+            return
+
+        if name.isdigit():
+            matches = saves[int(name) - 1:int(name)] if int(name) > 0 else []
         else:
-            name = arg
+            matches = [save for save in saves if save.startswith(name)]
 
-        load_data(name)
+        if len(matches) == 1:
+            load_data(matches[0])
+        elif matches:
+            print(f"Ambiguous save name '{name}': {', '.join(matches)}")
+        else:
+            print(f"Save file '{name}' not found")
 
     # ===== UTILITIES =====
     def do_exit(self, arg):
@@ -247,7 +298,7 @@ class ExpenseTrackerCLI(cmd.Cmd):
         }
 
         # Validate transaction type
-        if result['type'] not in ('income', 'expense'):
+        if result['type'] not in TRANSACTION_SIGN:
             raise ValueError("Type must be 'income' or 'expense'")
 
         i = 2
@@ -255,7 +306,7 @@ class ExpenseTrackerCLI(cmd.Cmd):
             if args[i] == '--recur':
                 if i+1 >= len(args):
                     raise ValueError("Missing recurrence interval after --recur")
-                if args[i+1] not in ('daily', 'weekly', 'monthly', 'yearly'):
+                if args[i+1] not in _RECUR_INTERVALS:
                     raise ValueError("Invalid interval, use: daily/weekly/monthly/yearly")
                 result['recur_interval'] = args[i+1]
                 i += 2
@@ -309,20 +360,11 @@ class ExpenseTrackerCLI(cmd.Cmd):
 
         i = 0
         while i < len(args):
-            if args[i] == '--day':
-                result['timeframe'] = 'day'
-                if i+1 < len(args) and not args[i+1].startswith('-'):
-                    result['day'] = int(args[i+1])
-                    i += 1
-            elif args[i] == '--month':
-                result['timeframe'] = 'month'
-                if i+1 < len(args) and not args[i+1].startswith('-'):
-                    result['month'] = int(args[i+1])
-                    i += 1
-            elif args[i] == '--year':
-                result['timeframe'] = 'year'
+            field = _REPORT_TIMEFRAMES.get(args[i])
+            if field is not None:
+                result['timeframe'] = field
                 if i+1 < len(args) and not args[i+1].startswith('-'):
-                    result['year'] = int(args[i+1])
+                    result[field] = int(args[i+1])
                     i += 1
             elif args[i] == '--categories':
                 result['show_categories'] = True
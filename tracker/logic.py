@@ -1,29 +1,91 @@
+from bisect import bisect_left, bisect_right, insort
+from calendar import isleap, monthrange
 from datetime import date, timedelta
-from dateutil.relativedelta import relativedelta
+from itertools import chain
+from operator import attrgetter
 from typing import Optional
 
 from tracker.models import (
-    TransactionType, Transaction, BudgetCategory, BalanceCheckpoint, transactions, budget_categories, balance_history
+    TransactionType, TRANSACTION_SIGN, Transaction, BudgetCategory, BalanceCheckpoint, CategoryTotals, SpendingReport,
+    transactions, budget_categories,
+    balance_history, budget_category_index, balance_cache, transactions_by_date, monthly_totals,
+    daily_totals, derived_state, reset_derived_state
 )
 
 
+_by_date = attrgetter("t_date")
+_by_checkpoint_date = attrgetter("date")
+
+
+def _tally(totals: dict, t: Transaction, sign: int = 1) -> None:
+    name = t.category.name if t.category is not None else None
+    by_type = totals.get(name)
+    if by_type is None:
+        by_type = totals[name] = {"income": 0, "expense": 0}
+    by_type[t.t_type] += sign * to_cents(t.amount)
+
+
+def _tally_periods(t: Transaction, sign: int = 1) -> None:
+    _tally(monthly_totals.setdefault((t.t_date.year, t.t_date.month), {}), t, sign)
+    _tally(daily_totals.setdefault(t.t_date, {}), t, sign)
+
+
+def _date_index() -> list[Transaction]:
+    # The date index and the monthly and daily totals are updated together by
+    # the functions below, and rebuilt together after reset_derived_state.
+    if derived_state["date_index_stale"]:
+        transactions_by_date[:] = sorted(transactions, key=_by_date)
+        monthly_totals.clear()
+        daily_totals.clear()
+        for t in transactions_by_date:
+            _tally_periods(t)
+        derived_state["date_index_stale"] = False
+    return transactions_by_date
+
+
+def transactions_between(start: date, end: date) -> list[Transaction]:
+    by_date = _date_index()
+    return by_date[bisect_left(by_date, start, key=_by_date):bisect_right(by_date, end, key=_by_date)]
+
+
+def _reindex_categories() -> None:
+    budget_category_index.clear()
+    budget_category_index.update({cat.name: i for i, cat in enumerate(budget_categories)})
+
+
+def find_category(name: str) -> Optional[BudgetCategory]:
+    # reset_derived_state empties the index; it is rebuilt on the next lookup
+    if not budget_category_index and budget_categories:
+        _reindex_categories()
+    i = budget_category_index.get(name)
+    return budget_categories[i] if i is not None else None
+
+
 def add_budget_category(name: str, limit: Optional[float] = None):
-    for cat in budget_categories:
-        if cat.name == name:
-            return
+    if find_category(name) is not None:
+        return
 
+    budget_category_index[name] = len(budget_categories)
     budget_categories.append(BudgetCategory(name, limit))
 
 
 def delete_budget_category(category_name: str) -> bool:
     global budget_categories, transactions
 
-    count = len(budget_categories)
-    budget_categories[:] = [cat for cat in budget_categories if cat.name != category_name]
-
-    if len(budget_categories) == count:
+    if find_category(category_name) is None:
         return False
 
+    del budget_categories[budget_category_index[category_name]]
+    _reindex_categories()
+
+    _date_index()
+    for totals in chain(monthly_totals.values(), daily_totals.values()):
+        moved = totals.pop(category_name, None)
+        if moved is not None:
+            uncategorised = totals.setdefault(None, {"income": 0, "expense": 0})
+            uncategorised["income"] += moved["income"]
+            uncategorised["expense"] += moved["expense"]
+
     for t in transactions:
         if t.category:
             if t.category.name == category_name:
@@ -33,10 +95,11 @@ def delete_budget_category(category_name: str) -> bool:
 
 
 def find_or_create_category(name: str) -> BudgetCategory:
-    for cat in budget_categories:
-        if cat.name == name:
-            return cat
+    cat = find_category(name)
+    if cat is not None:
+        return cat
     new_cat = BudgetCategory(name)
+    budget_category_index[name] = len(budget_categories)
     budget_categories.append(new_cat)
     return new_cat
 
@@ -64,6 +127,9 @@ def add_transaction(
         category=category
     )
     transactions.append(transaction)
+    insort(transactions_by_date, transaction, key=_by_date)
+    _tally_periods(transaction)
+    balance_cache.clear()
     if category is not None:
         category.transactions.append(transaction)
 
@@ -75,7 +141,18 @@ def delete_transaction(transaction_id: int) -> bool:
         if t.id == transaction_id:
             if t.category:
                 t.category.transactions = [tr for tr in t.category.transactions if tr.id != transaction_id]
+            by_date = _date_index()
+            same_day = range(bisect_left(by_date, t.t_date, key=_by_date),
+                             bisect_right(by_date, t.t_date, key=_by_date))
+            j = next((j for j in same_day if by_date[j] is t), None)
             transactions.pop(i)
+            if j is None:
+                # The list was edited behind the index's back; rebuild rather than patch it
+                reset_derived_state()
+            else:
+                del by_date[j]
+                _tally_periods(t, -1)
+            balance_cache.clear()
             return True
     return False
 
@@ -86,22 +163,35 @@ def delete_transactions_by_criteria(
         date_range: Optional[tuple[date, date]] = None,
         category_name: Optional[str] = None
 ) -> int:
-    global transactions
-
-    to_delete = []
-    for t in transactions:
+    candidates = transactions if date_range is None else transactions_between(*date_range)
+    deleted = {}
+    affected_cats = {}
+    for t in candidates:
         if ((amount is None or t.amount == amount) and
                 (t_type is None or t.t_type == t_type) and
-                (date_range is None or (date_range[0] <= t.t_date <= date_range[1])) and
                 (category_name is None or (t.category and t.category.name == category_name))):
-            to_delete.append(t.id)
-    initial_count = len(transactions)
-    transactions = [t for t in transactions if t.id not in to_delete]
-
-    for cat in budget_categories:
-        cat.transactions = [t for t in cat.transactions if t.id not in to_delete]
+            deleted[id(t)] = t
+            if t.category is not None:
+                affected_cats[id(t.category)] = t.category
+
+    if not deleted:
+        return 0
+
+    by_date = _date_index()
+    transactions[:] = [t for t in transactions if id(t) not in deleted]
+    kept = [t for t in by_date if id(t) not in deleted]
+    if len(by_date) - len(kept) != len(deleted):
+        # Some deleted rows were never indexed; rebuild rather than patch the totals
+        reset_derived_state()
+    else:
+        by_date[:] = kept
+        for t in deleted.values():
+            _tally_periods(t, -1)
+    balance_cache.clear()
+    for cat in affected_cats.values():
+        cat.transactions = [t for t in cat.transactions if id(t) not in deleted]
 
-    return initial_count - len(transactions)
+    return len(deleted)
 
 
 def set_timeframe(
@@ -109,135 +199,152 @@ def set_timeframe(
         month: Optional[int] = None,
         day: Optional[int] = None,
 ) -> tuple[str, date | int]:
+    today = date.today()
     if day is not None:
         timeframe = "day"
-        target_date = date(year or date.today().year,
-                           month or date.today().month,
+        target_date = date(year or today.year,
+                           month or today.month,
                            day)
     elif month is not None:
         timeframe = "month"
-        target_date = date(year or date.today().year, month, 1)
+        target_date = date(year or today.year, month, 1)
     elif year is not None:
         timeframe = "year"
         target_date = year
     else:
         timeframe = "day"
-        target_date = date.today()
+        target_date = today
 
     return timeframe, target_date
 
 
-def check_spending(day: Optional[int] = None, month: Optional[int] = None, year: Optional[int] = None):
-    timeframe, target_date = set_timeframe(year, month, day)
+def _cents_to_totals(cents: dict[TransactionType, int]) -> CategoryTotals:
+    return CategoryTotals(
+        income=cents["income"] / 100,
+        expense=cents["expense"] / 100,
+        net=(cents["income"] - cents["expense"]) / 100
+    )
 
-    total = {
-        "expense": 0.0,
-        "income": 0.0,
-        "net": 0.0
-    }
 
-    categories = {
-        category.name: {
-            "income": 0.0,
-            "expense": 0.0,
-            "net": 0.0
-        } for category in budget_categories
-    }
+def check_spending(
+        day: Optional[int] = None,
+        month: Optional[int] = None,
+        year: Optional[int] = None,
+        include_categories: bool = True,
+) -> SpendingReport:
+    timeframe, target_date = set_timeframe(year, month, day)
 
-    for t in transactions:
-        if timeframe == "day" and t.t_date == target_date:
-            pass
-        elif timeframe == "month":
-            if not (t.t_date.year == target_date.year and
-                    t.t_date.month == target_date.month):
-                continue
-        elif timeframe == "year":
-            if t.t_date.year != target_date:
-                continue
-
-        total[t.t_type] += t.amount
-        if t.category.name in categories:
-            categories[t.category.name][t.t_type] += t.amount
-            categories[t.category.name]["net"] += t.amount if t.t_type == "income" else -t.amount
-
-    total["net"] = total["income"] - total["expense"]
-
-    return {
-        "timeframe": timeframe,
-        "target_date": target_date.isoformat() if hasattr(target_date, "isoformat") else target_date,
-        "totals": total,
-        "categories": categories
-    }
-
-
-def update_bal(bal, t_amount, t_type):
-    if t_type == "income":
-        bal += t_amount
+    _date_index()
+    if timeframe == "day":
+        period_totals = [daily_totals[target_date]] if target_date in daily_totals else []
     else:
-        bal -= t_amount
-    return round(bal, 2)
+        months = [(target_date.year, target_date.month)] if timeframe == "month" else \
+            [(target_date, m) for m in range(1, 13)]
+        period_totals = [monthly_totals[key] for key in months if key in monthly_totals]
+
+    total = {"income": 0, "expense": 0}
+    category_cents = {}
+    if include_categories:
+        category_cents = {category.name: {"income": 0, "expense": 0} for category in budget_categories}
+    for totals in period_totals:
+        for name, by_type in totals.items():
+            total["income"] += by_type["income"]
+            total["expense"] += by_type["expense"]
+            if name in category_cents:
+                category_cents[name]["income"] += by_type["income"]
+                category_cents[name]["expense"] += by_type["expense"]
+
+    return SpendingReport(
+        timeframe=timeframe,
+        target_date=target_date.isoformat() if hasattr(target_date, "isoformat") else target_date,
+        totals=_cents_to_totals(total),
+        categories={name: _cents_to_totals(cents) for name, cents in category_cents.items()}
+    )
+
+
+def to_cents(amount: float) -> int:
+    return round(amount * 100)
 
 
 def set_balance_checkpoint(cp_date: date, amount: float):
-    balance_history[:] = [cp for cp in balance_history if cp.date != cp_date]
-    balance_history.append(BalanceCheckpoint(cp_date, amount))
-    balance_history.sort(key=lambda x: x.date)
+    # balance_history is sorted by date, so an existing checkpoint for the
+    # same date sits exactly where the new one belongs
+    i = bisect_left(balance_history, cp_date, key=_by_checkpoint_date)
+    if i < len(balance_history) and balance_history[i].date == cp_date:
+        balance_history[i] = BalanceCheckpoint(cp_date, amount)
+    else:
+        balance_history.insert(i, BalanceCheckpoint(cp_date, amount))
+    balance_cache.clear()
 
 
 def get_nearest_checkpoint(target_date: date) -> BalanceCheckpoint | None:
-    valid_cps = [cp for cp in balance_history if cp.date <= target_date]
-    if not valid_cps:
-        return None
-    return max(valid_cps, key=lambda x: x.date)
+    i = bisect_right(balance_history, target_date, key=_by_checkpoint_date)
+    return balance_history[i - 1] if i else None
+
+
+def _count_daily(start: date, until: date) -> int:
+    return (until - start).days + 1
+
+
+def _count_weekly(start: date, until: date) -> int:
+    return (until - start).days // 7 + 1
+
+
+def _count_monthly(start: date, until: date) -> int:
+    months = (until.year - start.year) * 12 + (until.month - start.month)
+    # Days past the end of a short month fall on its last day (Jan 31 -> Feb 28)
+    if min(start.day, monthrange(until.year, until.month)[1]) > until.day:
+        months -= 1
+    return months + 1
+
+
+def _count_yearly(start: date, until: date) -> int:
+    month, day = start.month, start.day
+    # Feb 29 falls on Feb 28 in non-leap years
+    if month == 2 and day == 29 and not isleap(until.year):
+        day = 28
+    return until.year - start.year + ((until.month, until.day) >= (month, day))
+
+
+_OCCURRENCE_COUNTERS = {
+    "daily": _count_daily,
+    "weekly": _count_weekly,
+    "monthly": _count_monthly,
+    "yearly": _count_yearly,
+}
+
+
+def count_occurrences(transaction: Transaction, until: date) -> int:
+    """Number of times a transaction has hit the balance on or before `until`."""
+    start = transaction.t_date
+    if start > until:
+        return 0
+    counter = _OCCURRENCE_COUNTERS.get(transaction.rec_interval) if transaction.is_rec else None
+    return counter(start, until) if counter else 1
 
 
 def calc_proj_bal(target_date: date) -> float:
+    # Every change to transactions or checkpoints clears the cache
+    if target_date in balance_cache:
+        return balance_cache[target_date]
+
     bal_cp = get_nearest_checkpoint(target_date)
-    cp_valid = get_nearest_checkpoint(target_date) is not None
 
-    if cp_valid:
-        balance = bal_cp.amount
-        c_date = bal_cp.date
+    if bal_cp is not None:
+        cents = to_cents(bal_cp.amount)
+        before_cp = bal_cp.date - timedelta(days=1)
     else:
-        balance = 0
-        c_date = min(
-            min((transaction.t_date for transaction in transactions), default=date.today()), date.today()
-        )
-
-    while c_date <= target_date:
-        for transaction in transactions:
-            if transaction.t_date > c_date:
-                continue
-            if not transaction.is_rec and transaction.t_date == c_date:
-                balance = update_bal(balance, transaction.amount, transaction.t_type)
-            elif transaction.is_rec:
-                if transaction.t_date == c_date:
-                    balance = update_bal(balance, transaction.amount, transaction.t_type)
-                elif c_date > transaction.t_date:
-                    delta = c_date - transaction.t_date
-                    if transaction.rec_interval == "daily" and delta.days > 0:
-                        balance = update_bal(balance, transaction.amount, transaction.t_type)
-                    elif transaction.rec_interval == "weekly" and delta.days > 0 and delta.days % 7 == 0:
-                        balance = update_bal(balance, transaction.amount, transaction.t_type)
-                    elif transaction.rec_interval == "monthly":
-                        months_diff = (c_date.year - transaction.t_date.year) * 12 + \
-                                      (c_date.month - transaction.t_date.month)
-                        if months_diff > 0:
-                            expected_date = transaction.t_date + relativedelta(months=months_diff)
-                            if c_date == expected_date:
-                                balance = update_bal(balance, transaction.amount, transaction.t_type)
-                    elif transaction.rec_interval == "yearly":
-                        is_leap = c_date.year % 4 and (c_date.year % 100 != 0 or c_date.year % 400 == 0)
-                        if transaction.t_date.month == 2 and transaction.t_date.day == 29:
-                            if is_leap and c_date.month == 2 and c_date.day == 29:
-                                balance = update_bal(balance, transaction.amount, transaction.t_type)
-                            elif not is_leap and c_date.month == 2 and c_date.day == 28:
-                                balance = update_bal(balance, transaction.amount, transaction.t_type)
-                        else:
-                            if c_date.day == transaction.t_date.day and \
-                                    c_date.month == transaction.t_date.month and \
-                                    c_date.year > transaction.t_date.year:
-                                balance = update_bal(balance, transaction.amount, transaction.t_type)
-
-        c_date += timedelta(days=1)
+        cents = 0
+        before_cp = None
+
+    # Summed in whole cents so there is no float drift to round away per step
+    for transaction in transactions:
+        count = count_occurrences(transaction, target_date)
+        if before_cp is not None:
+            count -= count_occurrences(transaction, before_cp)
+        if count:
+            cents += TRANSACTION_SIGN[transaction.t_type] * to_cents(transaction.amount) * count
+
+    balance = cents / 100
+    balance_cache[target_date] = balance
     return balance
@@ -5,16 +5,17 @@ from typing import Optional, List, Literal
 
 
 TransactionType = Literal["income", "expense"]
+TRANSACTION_SIGN: dict[TransactionType, int] = {"income": 1, "expense": -1}
 
 
-@dataclass
+@dataclass(slots=True)
 class BudgetCategory:
     name: str
     monthly_limit: Optional[float] = None
     transactions: List[Transaction] = field(default_factory=list)
 
 
-@dataclass
+@dataclass(slots=True)
 class Transaction:
     amount: float
     t_type: TransactionType
@@ -26,12 +27,49 @@ class Transaction:
     id: int = field(default_factory=lambda: len(transactions) + 1)
 
 
-@dataclass
+@dataclass(slots=True)
 class BalanceCheckpoint:
     date: date
     amount: float
 
 
+@dataclass(slots=True)
+class CategoryTotals:
+    income: float = 0.0
+    expense: float = 0.0
+    net: float = 0.0
+
+
+@dataclass(slots=True)
+class SpendingReport:
+    timeframe: str
+    target_date: str | int
+    totals: CategoryTotals
+    categories: dict[str, CategoryTotals]
+
+
 budget_categories: list[BudgetCategory] = []
+budget_category_index: dict[str, int] = {}
 transactions: list[Transaction] = []
+transactions_by_date: list[Transaction] = []
+# (year, month) -> category name (None if uncategorised) -> cents per transaction type
+monthly_totals: dict[tuple[int, int], dict[str | None, dict[TransactionType, int]]] = {}
+# The same per day, keyed by date
+daily_totals: dict[date, dict[str | None, dict[TransactionType, int]]] = {}
 balance_history: list[BalanceCheckpoint] = []
+balance_cache: dict[date, float] = {}
+# Set by reset_derived_state so the date index and period totals are rebuilt on next use
+derived_state = {"date_index_stale": False}
+
+
+def reset_derived_state() -> None:
+    """Drop every index and total derived from the lists above.
+
+    Call this after editing the lists directly rather than through tracker.logic.
+    """
+    transactions_by_date.clear()
+    monthly_totals.clear()
+    daily_totals.clear()
+    balance_cache.clear()
+    budget_category_index.clear()
+    derived_state["date_index_stale"] = True
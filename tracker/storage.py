@@ -1,67 +1,185 @@
 import json
+import mmap
+import os
 from pathlib import Path
 from datetime import date
-from .models import transactions, balance_history, budget_categories, BudgetCategory, Transaction, BalanceCheckpoint
+from functools import lru_cache
+from operator import attrgetter
+from .models import (
+    TRANSACTION_SIGN, transactions, balance_history, budget_categories, budget_category_index,
+    reset_derived_state, BudgetCategory, Transaction, BalanceCheckpoint
+)
+
+try:
+    import orjson
+except ImportError:  # optional, the stdlib encoder is used without it
+    orjson = None
+
+try:
+    import zstandard
+except ImportError:  # optional, only needed for compressed saves
+    zstandard = None
 
 
 SAVES_DIR = Path("saves")
 SAVES_DIR.mkdir(exist_ok=True)
 
+SAVE_VERSION = "3.0"
+SAVE_SUFFIX = ".json"
+COMPRESSED_SAVE_SUFFIX = ".json.zst"
+ZSTD_LEVEL = 3
+WRITE_BUFFER_SIZE = 1 << 20
+
+_save_list_cache = {"mtime": None, "names": []}
+
+# Version 1 stores ISO date strings; later saves store date ordinals.
+_MAX_ORDINAL = date.max.toordinal()
+TRANSACTION_FIELDS = ("id", "amount", "t_type", "t_date", "is_rec", "rec_interval", "desc", "category")
+
+
+def _json_default(obj):
+    # orjson encodes dates itself, the stdlib encoder needs this for them
+    if isinstance(obj, date):
+        return obj.isoformat()
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+
+def _require_zstandard():
+    if zstandard is None:
+        raise RuntimeError("compressed saves need the zstandard package (pip install zstandard)")
+
+
+def _replace_file(path: Path, write, mode="wb", **open_args) -> None:
+    # Written beside the target and renamed over it, so a save that fails
+    # part way leaves the previous file intact
+    tmp_path = path.with_name(f"{path.name}.tmp")
+    try:
+        with open(tmp_path, mode, **open_args) as f:
+            write(f)
+        os.replace(tmp_path, path)
+    except BaseException:
+        tmp_path.unlink(missing_ok=True)
+        raise
+
+
+def _write_json(paths: list[Path], data, pretty=False, compress=False) -> None:
+    # Compact unless asked otherwise; indenting roughly doubles size and encode time
+    json_format = {"indent": 2} if pretty else {"separators": (",", ":")}
+    if orjson is not None:
+        payload = orjson.dumps(data, default=_json_default, option=orjson.OPT_INDENT_2 if pretty else 0)
+    elif len(paths) == 1 and not compress:
+        # json.dump encodes incrementally, so the document is never held as one str
+        _replace_file(paths[0], lambda f: json.dump(data, f, default=_json_default, **json_format),
+                      "w", encoding="utf-8", buffering=WRITE_BUFFER_SIZE)
+        return
+    else:
+        payload = json.dumps(data, default=_json_default, **json_format).encode()
+
+    if compress:
+        payload = zstandard.ZstdCompressor(level=ZSTD_LEVEL).compress(payload)
+
+    for path in paths:
+        _replace_file(path, lambda f: f.write(payload))
+
+
+def _write_save(save_names: list[str], data, pretty=False, compress=False) -> None:
+    if compress:
+        _require_zstandard()
+    suffix, other_suffix = (COMPRESSED_SAVE_SUFFIX, SAVE_SUFFIX) if compress else (SAVE_SUFFIX, COMPRESSED_SAVE_SUFFIX)
+    try:
+        _write_json([SAVES_DIR / f"{name}{suffix}" for name in save_names], data, pretty, compress)
+        # A save lives under one suffix at a time, so a copy in the other
+        # format would otherwise shadow or be shadowed by this one
+        for name in save_names:
+            (SAVES_DIR / f"{name}{other_suffix}").unlink(missing_ok=True)
+    finally:
+        # The directory mtime may not tick between saves made in quick succession
+        _save_list_cache["mtime"] = None
+
 
-class EnhancedJSONEncoder(json.JSONEncoder):
-    def default(self, obj):
-        if isinstance(obj, date):
-            return obj.isoformat()
-        if isinstance(obj, BudgetCategory):
-            return {
-                "name": obj.name,
-                "monthly_limit": obj.monthly_limit,
-            }
-        return super().default(obj)
+def _loads(raw: bytes):
+    if orjson is not None:
+        return orjson.loads(raw)
+    return json.loads(raw)
+
+
+def _read_json(path: Path):
+    if path.name.endswith(COMPRESSED_SAVE_SUFFIX):
+        _require_zstandard()
+        return _loads(zstandard.ZstdDecompressor().decompress(path.read_bytes()))
+    if orjson is None:
+        return _loads(path.read_bytes())
+    # orjson parses straight from the mapped pages, so the file is never
+    # copied into a bytes object first (the stdlib parser can't take a buffer)
+    with open(path, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+        with memoryview(mm) as view:
+            return orjson.loads(view)
 
 
 def list_save_files():
-    return [f.stem for f in SAVES_DIR.glob("*.json")]
+    # Adding or removing a file bumps the directory's mtime, so one stat
+    # tells whether the cached listing is still current.
+    mtime = SAVES_DIR.stat().st_mtime_ns
+    if mtime != _save_list_cache["mtime"]:
+        with os.scandir(SAVES_DIR) as entries:
+            _save_list_cache["names"] = sorted({
+                entry.name.removesuffix(COMPRESSED_SAVE_SUFFIX).removesuffix(SAVE_SUFFIX)
+                for entry in entries
+                if entry.name.endswith((SAVE_SUFFIX, COMPRESSED_SAVE_SUFFIX)) and entry.is_file()
+            })
+        _save_list_cache["mtime"] = mtime
+    return list(_save_list_cache["names"])
+
+
+def _find_save(save_name) -> Path | None:
+    for suffix in (SAVE_SUFFIX, COMPRESSED_SAVE_SUFFIX):
+        path = SAVES_DIR / f"{save_name}{suffix}"
+        if path.is_file():
+            return path
+    return None
+
 
+def save_exists(save_name):
+    return _find_save(save_name) is not None
 
-def save_data(save_name="default"):
-    data = {
+
+def _save_payload():
+    # Sections are stored as columns (one list per field) rather than one
+    # object per row, and dates as ordinals; load_data still reads the
+    # version 1 row layout and ISO dates.
+    return {
         "metadata": {
-            "version": "1.0",
-            "created": date.today().isoformat(),
+            "version": SAVE_VERSION,
+            "created": date.today(),
             "transaction_counter": len(transactions)
         },
-        "categories": [
-            {
-                "name": cat.name,
-                "monthly_limit": cat.monthly_limit,
-                "transaction_ids": [t.id for t in cat.transactions]
-            } for cat in budget_categories
-        ],
-        "transactions": [
-            {
-                "id": t.id,
-                "amount": t.amount,
-                "t_type": t.t_type,
-                "t_date": t.t_date.isoformat(),
-                "is_rec": t.is_rec,
-                "rec_interval": t.rec_interval,
-                "desc": t.desc,
-                "category": t.category.name if t.category else None
-            } for t in transactions
-        ],
-        "checkpoints": [
-            {
-                "date": cp.date.isoformat(),
-                "amount": cp.amount
-            } for cp in balance_history
-        ]
+        "categories": {
+            "name": list(map(attrgetter("name"), budget_categories)),
+            "monthly_limit": list(map(attrgetter("monthly_limit"), budget_categories)),
+            "transaction_ids": [list(map(attrgetter("id"), cat.transactions)) for cat in budget_categories]
+        },
+        "transactions": {
+            "id": list(map(attrgetter("id"), transactions)),
+            "amount": list(map(attrgetter("amount"), transactions)),
+            "t_type": list(map(attrgetter("t_type"), transactions)),
+            "t_date": [t.t_date.toordinal() for t in transactions],
+            "is_rec": list(map(attrgetter("is_rec"), transactions)),
+            "rec_interval": list(map(attrgetter("rec_interval"), transactions)),
+            "desc": list(map(attrgetter("desc"), transactions)),
+            "category": [cat.name if cat else None for cat in map(attrgetter("category"), transactions)]
+        },
+        "checkpoints": {
+            "date": [cp.date.toordinal() for cp in balance_history],
+            "amount": list(map(attrgetter("amount"), balance_history))
+        }
     }
 
+
+def save_data(save_name="default", pretty=False, compress=False):
+    data = _save_payload()
+
     try:
-        json_str = json.dumps(data, cls=EnhancedJSONEncoder, indent=2)
-        save_path = SAVES_DIR / f"{save_name}.json"
-        save_path.write_text(json_str)
+        _write_save([save_name], data, pretty, compress)
         print(f"✓ Saved {len(transactions)} transactions to '{save_name}'")
         return True
     except Exception as e:
@@ -69,65 +187,154 @@ def save_data(save_name="default"):
         return False
 
 
+def save_data_batch(save_names, pretty=False, compress=False):
+    # Same data under several names, serialized once for all of them
+    try:
+        _write_save(save_names, _save_payload(), pretty, compress)
+        print(f"✓ Saved {len(transactions)} transactions to {', '.join(repr(name) for name in save_names)}")
+        return True
+    except Exception as e:
+        print(f"Error saving data: {e}")
+        return False
+
+
+def _category_rows(data, columnar):
+    section = data.get("categories", [])
+    if columnar:
+        return zip(section["name"], section["monthly_limit"], section["transaction_ids"], strict=True)
+    return [(c["name"], c.get("monthly_limit"), c.get("transaction_ids", [])) for c in section]
+
+
+def _transaction_rows(data, columnar):
+    section = data.get("transactions", [])
+    if columnar:
+        return zip(*(section[field] for field in TRANSACTION_FIELDS), strict=True)
+    return [_row_values(t_data) for t_data in section]
+
+
+def _row_values(t_data):
+    return (t_data.get("id"), t_data.get("amount"), t_data.get("t_type"), t_data.get("t_date"),
+            t_data.get("is_rec", False), t_data.get("rec_interval"), t_data.get("desc", ""), t_data.get("category"))
+
+
+def _checkpoint_rows(data, columnar):
+    section = data.get("checkpoints", [])
+    if columnar:
+        return zip(section["date"], section["amount"], strict=True)
+    return [(cp.get("date"), cp.get("amount")) for cp in section]
+
+
+@lru_cache(maxsize=8192)
+def _parse_iso_date(value: str) -> date | None:
+    # Many transactions share a date, so each distinct string is parsed
+    # (or rejected) once
+    try:
+        return date.fromisoformat(value)
+    except ValueError:
+        return None
+
+
+def _decode_iso_date(value) -> date | None:
+    return _parse_iso_date(value) if isinstance(value, str) else None
+
+
+def _decode_ordinal_date(value) -> date | None:
+    return date.fromordinal(value) if type(value) is int and 1 <= value <= _MAX_ORDINAL else None
+
+
+def _is_amount(value) -> bool:
+    return type(value) in (int, float)
+
+
+def _is_optional_str(value) -> bool:
+    return value is None or type(value) is str
+
+
+def _transaction_date(row, decode_date) -> date | None:
+    # The row's date if every field has a type Transaction can hold, else None
+    t_id, amount, t_type, t_date, is_rec, rec_interval, desc, category = row
+    if (type(t_id) is int and _is_amount(amount) and type(t_type) is str and t_type in TRANSACTION_SIGN
+            and type(is_rec) is bool and _is_optional_str(rec_interval) and type(desc) is str
+            and _is_optional_str(category)):
+        return decode_date(t_date)
+    return None
+
+
+def _checkpoint_date(row, decode_date) -> date | None:
+    cp_date, amount = row
+    return decode_date(cp_date) if _is_amount(amount) else None
+
+
+def _split_valid(rows, row_date, decode_date) -> tuple[list, list]:
+    # Valid rows come back paired with their decoded date, so it is decoded once
+    valid, invalid = [], []
+    for row in rows:
+        d = row_date(row, decode_date)
+        if d is None:
+            invalid.append(row)
+        else:
+            valid.append((row, d))
+    return valid, invalid
+
+
+def _decode_transaction(row, t_date):
+    t_id, amount, t_type, _, is_rec, rec_interval, desc, category = row
+    i = budget_category_index.get(category) if category else None
+    # Positional, in Transaction's field order: keyword arguments cost a
+    # measurable share of the constructor call on large loads
+    return Transaction(
+        amount, t_type, t_date, is_rec, rec_interval, desc,
+        budget_categories[i] if i is not None else None,
+        t_id
+    )
+
+
+def _clear_data():
+    transactions.clear()
+    balance_history.clear()
+    budget_categories.clear()
+    reset_derived_state()
+
+
 def load_data(save_name="default"):
-    global transactions, balance_history, budget_categories
     try:
-        filepath = SAVES_DIR / f"{save_name}.json"
-        if not filepath.exists():
+        filepath = _find_save(save_name)
+        if filepath is None:
             print(f"Save file '{save_name}' not found")
             return False
 
-        data = json.loads(filepath.read_text())
-
-        transactions.clear()
-        balance_history.clear()
-        budget_categories.clear()
-
-        category_map = {}
-        for cat_data in data.get("categories", []):
-            new_cat = BudgetCategory(
-                name=cat_data["name"],
-                monthly_limit=cat_data.get("monthly_limit")
-            )
-            budget_categories.append(new_cat)
-            category_map[new_cat.name] = new_cat
-
-        id_to_transaction = {}
-        for t_data in data.get("transactions", []):
-            try:
-                transaction = Transaction(
-                    id=t_data["id"],
-                    amount=t_data["amount"],
-                    t_type=t_data["t_type"],
-                    t_date=date.fromisoformat(t_data["t_date"]),
-                    is_rec=t_data["is_rec"],
-                    rec_interval=t_data["rec_interval"],
-                    desc=t_data["desc"],
-                    category=category_map.get(t_data["category"]) if t_data.get("category") else None
-                )
-                transactions.append(transaction)
-                id_to_transaction[transaction.id] = transaction
-            except Exception as e:
-                print(f"Warning: Skipping invalid transaction {t_data.get('id')}: {e}")
-
-        # 3. Rebuild category transaction lists
-        for cat_data in data.get("categories", []):
-            if cat_data["name"] in category_map:
-                category_map[cat_data["name"]].transactions = [
-                    id_to_transaction[t_id]
-                    for t_id in cat_data.get("transaction_ids", [])
-                    if t_id in id_to_transaction
-                ]
-
-        # 4. Restore balance checkpoints
-        for cp_data in data.get("checkpoints", []):
-            try:
-                balance_history.append(BalanceCheckpoint(
-                    date=date.fromisoformat(cp_data["date"]),
-                    amount=cp_data["amount"]
-                ))
-            except Exception as e:
-                print(f"Warning: Skipping invalid checkpoint: {e}")
+        data = _read_json(filepath)
+        version = data.get("metadata", {}).get("version", "1.0")
+        columnar = version != "1.0"
+        decode_date = _decode_ordinal_date if columnar else _decode_iso_date
+
+        _clear_data()
+
+        # Each category keeps its saved transaction ids until the transactions exist
+        pending = [
+            (BudgetCategory(name=name, monthly_limit=monthly_limit), transaction_ids)
+            for name, monthly_limit, transaction_ids in _category_rows(data, columnar)
+        ]
+        budget_categories.extend([cat for cat, _ in pending])
+        budget_category_index.update({cat.name: i for i, cat in enumerate(budget_categories)})
+
+        # Rows are checked up front so decoding them can't fail part way
+        rows, invalid = _split_valid(_transaction_rows(data, columnar), _transaction_date, decode_date)
+        for row in invalid:
+            print(f"Warning: Skipping invalid transaction {row[0]}")
+        loaded = [_decode_transaction(row, t_date) for row, t_date in rows]
+        transactions.extend(loaded)
+        id_to_transaction = {t.id: t for t in loaded}
+
+        for cat, transaction_ids in pending:
+            cat.transactions = [t for t in map(id_to_transaction.get, transaction_ids) if t is not None]
+
+        rows, invalid = _split_valid(_checkpoint_rows(data, columnar), _checkpoint_date, decode_date)
+        for cp_date, _ in invalid:
+            print(f"Warning: Skipping invalid checkpoint {cp_date}")
+        balance_history.extend([BalanceCheckpoint(date=cp_date, amount=amount) for (_, amount), cp_date in rows])
+        # Projections bisect the checkpoints by date
+        balance_history.sort(key=attrgetter("date"))
 
         print(f"✓ Loaded {len(transactions)} transactions, {len(budget_categories)} categories")
         return True
@@ -135,7 +342,5 @@ def load_data(save_name="default"):
     except Exception as e:
         print(f"Error loading data: {e}")
         # Clear partial load on failure
-        transactions.clear()
-        balance_history.clear()
-        budget_categories.clear()
-        return False
\ No newline at end of file
+        _clear_data()
+        return False
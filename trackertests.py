@@ -2,23 +2,45 @@ import unittest
 import json
 import os
 from datetime import date, timedelta
+from decimal import Decimal
 from pathlib import Path
 from unittest.mock import patch
 from tracker.models import (
     TransactionType, Transaction, BudgetCategory,
-    BalanceCheckpoint, budget_categories, transactions, balance_history
+    BalanceCheckpoint, budget_categories, transactions, balance_history, reset_derived_state
 )
 
 from tracker.logic import (
     add_budget_category, delete_budget_category, find_or_create_category,
     add_transaction, check_spending, set_balance_checkpoint, get_nearest_checkpoint,
-    calc_proj_bal
+    calc_proj_bal, delete_transaction, delete_transactions_by_criteria
 )
 
 from tracker.storage import (
-    save_data, load_data, list_save_files, SAVES_DIR
+    save_data, save_data_batch, load_data, list_save_files, SAVES_DIR
 )
 
+from tracker.cli import ExpenseTrackerCLI
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+
+def remove_test_saves():
+    with os.scandir(SAVES_DIR) as entries:
+        test_saves = [e.path for e in entries if e.name.startswith("test_") and e.name.endswith((".json", ".json.zst"))]
+    for path in test_saves:
+        os.unlink(path)
+
+
+def run_cli(command):
+    """Run one CLI command and return what it printed"""
+    with patch("builtins.print") as mock_print:
+        ExpenseTrackerCLI().onecmd(command)
+    return "\n".join(" ".join(map(str, call.args)) for call in mock_print.call_args_list)
+
 
 class TestBudgetTracker(unittest.TestCase):
     def setUp(self):
@@ -26,10 +48,10 @@ class TestBudgetTracker(unittest.TestCase):
         budget_categories.clear()
         transactions.clear()
         balance_history.clear()
+        reset_derived_state()
 
         # Clear any test saves
-        for f in SAVES_DIR.glob("test_*.json"):
-            f.unlink()
+        remove_test_saves()
 
     def test_budget_category_creation(self):
         """Test BudgetCategory dataclass"""
@@ -110,6 +132,20 @@ class TestBudgetTracker(unittest.TestCase):
         cat3 = find_or_create_category("Transport")
         self.assertEqual(len(budget_categories), 2)
 
+    def test_find_or_create_category_after_delete(self):
+        """Test category lookups stay correct after deleting a category"""
+        add_budget_category("Food")
+        add_budget_category("Transport")
+        add_budget_category("Rent")
+
+        delete_budget_category("Food")
+        self.assertEqual(find_or_create_category("Rent"), budget_categories[1])
+        self.assertEqual(len(budget_categories), 2)
+
+        food = find_or_create_category("Food")
+        self.assertIs(budget_categories[-1], food)
+        self.assertEqual(len(budget_categories), 3)
+
     def test_add_transaction(self):
         """Test adding transactions"""
         add_transaction(
@@ -137,6 +173,52 @@ class TestBudgetTracker(unittest.TestCase):
         self.assertEqual(len(trans.category.transactions), 1)
         self.assertEqual(trans.category.transactions[0], trans)
 
+    def test_direct_list_edits(self):
+        """Test reports after the transactions list is replaced without going through logic"""
+        add_transaction(10.0, "income", date(2023, 1, 1))
+        transactions[:] = [Transaction(99.0, "income", date(2023, 1, 5), id=1)]
+        reset_derived_state()
+
+        self.assertEqual(check_spending(day=5, month=1, year=2023).totals.income, 99.0)
+        self.assertEqual(calc_proj_bal(date(2023, 2, 1)), 99.0)
+
+        # Without the reset the index is stale, which delete must survive
+        transactions[:] = [Transaction(50.0, "income", date(2023, 1, 9), id=1)]
+        self.assertTrue(delete_transaction(1))
+        self.assertEqual(check_spending(day=5, month=1, year=2023).totals.income, 0)
+        self.assertEqual(calc_proj_bal(date(2023, 2, 1)), 0)
+
+    def test_delete_by_criteria_with_stale_index(self):
+        """Test filtered deletes of a transaction appended without going through logic"""
+        add_transaction(10.0, "income", date(2023, 1, 1))
+        check_spending(day=1, month=1, year=2023)
+        transactions.append(Transaction(7.0, "income", date(2023, 1, 1), id=2))
+
+        self.assertEqual(delete_transactions_by_criteria(t_type="income"), 2)
+        self.assertEqual(check_spending(day=1, month=1, year=2023).totals.income, 0)
+        self.assertEqual(calc_proj_bal(date(2023, 2, 1)), 0)
+
+    def test_delete_transactions_by_criteria(self):
+        """Test deleting transactions matching a filter"""
+        add_transaction(50.0, "expense", date(2023, 1, 1), "Food")
+        add_transaction(50.0, "expense", date(2023, 2, 1), "Transport")
+        add_transaction(20.0, "expense", date(2023, 1, 5), "Food")
+        add_transaction(50.0, "income", date(2023, 1, 9), "Food")
+
+        deleted = delete_transactions_by_criteria(amount=50.0, t_type="expense")
+        self.assertEqual(deleted, 2)
+        self.assertEqual([t.amount for t in transactions], [20.0, 50.0])
+
+        food = find_or_create_category("Food")
+        transport = find_or_create_category("Transport")
+        self.assertEqual([t.amount for t in food.transactions], [20.0, 50.0])
+        self.assertEqual(transport.transactions, [])
+
+        deleted = delete_transactions_by_criteria(date_range=(date(2023, 1, 1), date(2023, 1, 6)))
+        self.assertEqual(deleted, 1)
+        self.assertEqual(len(transactions), 1)
+        self.assertEqual(len(food.transactions), 1)
+
     def test_check_spending_daily(self):
         """Test checking spending for a day"""
         add_transaction(100.0, "income", date(2023, 1, 1), "Salary")
@@ -145,11 +227,36 @@ class TestBudgetTracker(unittest.TestCase):
 
         result = check_spending(day=1, month=1, year=2023)
 
-        self.assertEqual(result["timeframe"], "day")
-        self.assertEqual(result["target_date"], "2023-01-01")
-        self.assertEqual(result["totals"]["income"], 100.0)
-        self.assertEqual(result["totals"]["expense"], 80.0)  # 50 + 30
-        self.assertEqual(result["totals"]["net"], 20.0)  # 100 - 80
+        self.assertEqual(result.timeframe, "day")
+        self.assertEqual(result.target_date, "2023-01-01")
+        self.assertEqual(result.totals.income, 100.0)
+        self.assertEqual(result.totals.expense, 80.0)  # 50 + 30
+        self.assertEqual(result.totals.net, 20.0)  # 100 - 80
+
+    def test_check_spending_daily_excludes_other_days(self):
+        """Test that a daily report ignores transactions on other days"""
+        add_transaction(100.0, "income", date(2023, 1, 1), "Salary")
+        add_transaction(40.0, "expense", date(2023, 1, 2), "Food")
+        add_transaction(25.0, "expense", date(2022, 1, 1), "Food")
+
+        result = check_spending(day=1, month=1, year=2023)
+
+        self.assertEqual(result.totals.income, 100.0)
+        self.assertEqual(result.totals.expense, 0.0)
+        self.assertEqual(result.categories["Food"].expense, 0.0)
+
+    def test_check_spending_after_delete(self):
+        """Test that deleted transactions drop out of reports"""
+        add_transaction(50.0, "expense", date(2023, 1, 10), "Food")
+        add_transaction(20.0, "expense", date(2023, 1, 3), "Food")
+        add_transaction(30.0, "expense", date(2023, 1, 10), "Food")
+
+        self.assertTrue(delete_transaction(transactions[0].id))
+        result = check_spending(month=1, year=2023)
+        self.assertEqual(result.totals.expense, 50.0)
+
+        result = check_spending(day=10, month=1, year=2023)
+        self.assertEqual(result.totals.expense, 30.0)
 
     def test_check_spending_monthly(self):
         """Test checking spending for a month"""
@@ -159,14 +266,35 @@ class TestBudgetTracker(unittest.TestCase):
 
         result = check_spending(month=1, year=2023)
 
-        self.assertEqual(result["timeframe"], "month")
-        self.assertEqual(result["target_date"], "2023-01-01")
-        self.assertEqual(result["totals"]["income"], 100.0)
-        self.assertEqual(result["totals"]["expense"], 50.0)
-        self.assertEqual(result["totals"]["net"], 50.0)
+        self.assertEqual(result.timeframe, "month")
+        self.assertEqual(result.target_date, "2023-01-01")
+        self.assertEqual(result.totals.income, 100.0)
+        self.assertEqual(result.totals.expense, 50.0)
+        self.assertEqual(result.totals.net, 50.0)
+
+        self.assertEqual(result.categories["Salary"].income, 100.0)
+        self.assertEqual(result.categories["Food"].expense, 50.0)
+
+    def test_check_spending_after_category_delete(self):
+        """Test that transactions of a deleted category are reported as uncategorised"""
+        add_transaction(50.0, "expense", date(2023, 1, 15), "Food")
+        add_transaction(20.0, "expense", date(2023, 1, 16), "Transport")
+        delete_budget_category("Food")
+        add_budget_category("Food")
+
+        result = check_spending(month=1, year=2023)
+        self.assertEqual(result.totals.expense, 70.0)
+        self.assertEqual(result.categories["Food"].expense, 0.0)
+        self.assertEqual(result.categories["Transport"].expense, 20.0)
+
+    def test_check_spending_without_categories(self):
+        """Test skipping the per-category breakdown"""
+        add_transaction(100.0, "income", date(2023, 1, 1), "Salary")
+        add_transaction(50.0, "expense", date(2023, 1, 15), "Food")
 
-        self.assertEqual(result["categories"]["Salary"]["income"], 100.0)
-        self.assertEqual(result["categories"]["Food"]["expense"], 50.0)
+        result = check_spending(month=1, year=2023, include_categories=False)
+        self.assertEqual(result.categories, {})
+        self.assertEqual(result.totals.net, 50.0)
 
     def test_check_spending_yearly(self):
         """Test checking spending for a year"""
@@ -176,14 +304,14 @@ class TestBudgetTracker(unittest.TestCase):
 
         result = check_spending(year=2023)
 
-        self.assertEqual(result["timeframe"], "year")
-        self.assertEqual(result["target_date"], 2023)
-        self.assertEqual(result["totals"]["income"], 1200.0)
-        self.assertEqual(result["totals"]["expense"], 600.0)
-        self.assertEqual(result["totals"]["net"], 600.0)
+        self.assertEqual(result.timeframe, "year")
+        self.assertEqual(result.target_date, 2023)
+        self.assertEqual(result.totals.income, 1200.0)
+        self.assertEqual(result.totals.expense, 600.0)
+        self.assertEqual(result.totals.net, 600.0)
 
-        self.assertEqual(result["categories"]["Salary"]["income"], 1200.0)
-        self.assertEqual(result["categories"]["Food"]["expense"], 600.0)
+        self.assertEqual(result.categories["Salary"].income, 1200.0)
+        self.assertEqual(result.categories["Food"].expense, 600.0)
 
     def test_balance_checkpoints(self):
         """Test balance checkpoint functionality"""
@@ -276,6 +404,21 @@ class TestBudgetTracker(unittest.TestCase):
         bal = calc_proj_bal(date(2023, 3, 1))
         self.assertEqual(bal, 1000.0)  # Jan + Feb income - Feb expense
 
+    def test_calc_proj_bal_after_changes(self):
+        """Test projections reflect transactions added after a previous projection"""
+        add_transaction(100.0, "income", date(2023, 1, 1))
+        self.assertEqual(calc_proj_bal(date(2023, 1, 5)), 100.0)
+
+        add_transaction(40.0, "expense", date(2023, 1, 2))
+        self.assertEqual(calc_proj_bal(date(2023, 1, 5)), 60.0)
+
+        set_balance_checkpoint(date(2023, 1, 3), 500.0)
+        self.assertEqual(calc_proj_bal(date(2023, 1, 5)), 500.0)
+
+        delete_transactions_by_criteria(t_type="expense")
+        set_balance_checkpoint(date(2023, 1, 3), 400.0)
+        self.assertEqual(calc_proj_bal(date(2023, 1, 5)), 400.0)
+
     def test_save_and_load_data(self):
         """Test saving and loading data"""
         # Create test data
@@ -308,6 +451,158 @@ class TestBudgetTracker(unittest.TestCase):
         self.assertEqual(len(balance_history), 1)
         self.assertEqual(balance_history[0].amount, 1000.0)
 
+    def test_load_version_1_save(self):
+        """Test loading a save written in the original row-per-object layout"""
+        data = {
+            "metadata": {"version": "1.0", "created": "2023-01-01"},
+            "categories": [{"name": "Food", "monthly_limit": 300.0, "transaction_ids": [1]}],
+            "transactions": [
+                {"id": 1, "amount": 25.0, "t_type": "expense", "t_date": "2023-01-02", "is_rec": False,
+                 "rec_interval": None, "desc": "", "category": "Food"},
+                {"amount": 5.0, "t_type": "expense", "t_date": "2023-01-03"}
+            ],
+            "checkpoints": [{"date": "2023-01-01", "amount": 1000.0}]
+        }
+        (SAVES_DIR / "test_v1.json").write_text(json.dumps(data))
+
+        self.assertTrue(load_data("test_v1"))
+        self.assertEqual(len(transactions), 1)
+        self.assertEqual(transactions[0].t_date, date(2023, 1, 2))
+        self.assertEqual(budget_categories[0].transactions, [transactions[0]])
+        self.assertEqual(balance_history[0].amount, 1000.0)
+
+    def test_load_skips_invalid_rows(self):
+        """Test invalid rows in a columnar save are skipped and the rest load"""
+        data = {
+            "metadata": {"version": "3.0", "created": "2023-01-01", "transaction_counter": 3},
+            "categories": {"name": ["Food"], "monthly_limit": [None], "transaction_ids": [[1]]},
+            "transactions": {
+                "id": [1, 2, 3], "amount": [25.0, 5.0, 5.0], "t_type": ["expense", "expense", "expense"],
+                "t_date": [date(2023, 1, 2).toordinal(), "2023-01-03", date(2023, 1, 3).toordinal()],
+                "is_rec": [False, False, False], "rec_interval": [None, None, None], "desc": ["", "", ""],
+                "category": ["Food", None, ["Food"]]
+            },
+            "checkpoints": {"date": [date(2023, 1, 1).toordinal(), 0], "amount": [1000.0, 5.0]}
+        }
+        (SAVES_DIR / "test_invalid_rows.json").write_text(json.dumps(data))
+
+        self.assertTrue(load_data("test_invalid_rows"))
+        self.assertEqual(len(transactions), 1)
+        self.assertEqual(len(balance_history), 1)
+        self.assertEqual(transactions[0].t_date, date(2023, 1, 2))
+        self.assertEqual(budget_categories[0].transactions, [transactions[0]])
+        self.assertEqual(balance_history[0].date, date(2023, 1, 1))
+
+    def test_load_uneven_columns(self):
+        """Test a columnar save whose columns differ in length is rejected"""
+        add_transaction(10.0, "income", date(2023, 1, 1))
+        add_transaction(20.0, "income", date(2023, 1, 2))
+        save_data("test_uneven")
+        path = SAVES_DIR / "test_uneven.json"
+        data = json.loads(path.read_text())
+        data["transactions"]["amount"] = [10.0]
+        path.write_text(json.dumps(data))
+
+        self.assertFalse(load_data("test_uneven"))
+        self.assertEqual(len(transactions), 0)
+
+    def test_failed_save_keeps_previous_file(self):
+        """Test a save that fails while encoding leaves the earlier save intact"""
+        add_transaction(100.0, "income", date(2023, 1, 1), "Salary")
+        save_data("test_keep")
+        saved = (SAVES_DIR / "test_keep.json").read_bytes()
+
+        transactions[0].amount = Decimal("1.5")
+        with patch("tracker.storage.orjson", None):
+            self.assertFalse(save_data("test_keep"))
+
+        self.assertEqual((SAVES_DIR / "test_keep.json").read_bytes(), saved)
+        self.assertEqual(list_save_files().count("test_keep"), 1)
+
+    def test_save_data_batch(self):
+        """Test saving the same data under several names at once"""
+        add_transaction(100.0, "income", date(2023, 1, 1), "Salary")
+
+        self.assertTrue(save_data_batch(["test_batch1", "test_batch2"]))
+        for name in ("test_batch1", "test_batch2"):
+            transactions.clear()
+            self.assertTrue(load_data(name))
+            self.assertEqual(len(transactions), 1)
+            self.assertEqual(transactions[0].category.name, "Salary")
+
+    @unittest.skipUnless(zstandard, "zstandard is not installed")
+    def test_save_compressed(self):
+        """Test a compressed save round-trips and replaces the plain copy"""
+        add_transaction(100.0, "income", date(2023, 1, 1), "Salary")
+        save_data("test_zst")
+
+        self.assertTrue(save_data("test_zst", compress=True))
+        self.assertTrue((SAVES_DIR / "test_zst.json.zst").exists())
+        self.assertFalse((SAVES_DIR / "test_zst.json").exists())
+        self.assertIn("test_zst", list_save_files())
+
+        transactions.clear()
+        self.assertTrue(load_data("test_zst"))
+        self.assertEqual(transactions[0].amount, 100.0)
+        self.assertEqual(transactions[0].category.name, "Salary")
+
+    def test_cli_report(self):
+        """Test the report command prints totals instead of failing"""
+        add_transaction(50.0, "income", date.today(), "Salary")
+
+        output = run_cli("report --categories")
+        self.assertNotIn("Error generating report", output)
+        self.assertIn("Income:   $50.00", output)
+        self.assertIn("Salary: $50.00", output)
+
+    def test_cli_load_exact_name(self):
+        """Test load with an exact save name skips the directory listing"""
+        add_transaction(100.0, "income", date(2023, 1, 1))
+        save_data("test_cli_exact")
+        transactions.clear()
+
+        with patch("tracker.storage.list_save_files") as listing:
+            run_cli("load test_cli_exact")
+        listing.assert_not_called()
+        self.assertEqual(len(transactions), 1)
+
+    def test_cli_load_by_number(self):
+        """Test load by list number, including out-of-range numbers"""
+        add_transaction(100.0, "income", date(2023, 1, 1))
+        save_data("test_cli_number")
+        transactions.clear()
+
+        self.assertIn("Save file '0' not found", run_cli("load 0"))
+        out_of_range = len(list_save_files()) + 1
+        self.assertIn(f"Save file '{out_of_range}' not found", run_cli(f"load {out_of_range}"))
+        self.assertEqual(len(transactions), 0)
+
+        run_cli(f"load {list_save_files().index('test_cli_number') + 1}")
+        self.assertEqual(len(transactions), 1)
+
+    def test_cli_load_by_prefix(self):
+        """Test load by unique prefix and refusal of an ambiguous one"""
+        add_transaction(100.0, "income", date(2023, 1, 1))
+        save_data("test_cli_prefix_a")
+        save_data("test_cli_prefix_b")
+        save_data("test_cli_unique")
+        transactions.clear()
+
+        self.assertIn("Ambiguous save name 'test_cli_prefix'", run_cli("load test_cli_prefix"))
+        self.assertEqual(len(transactions), 0)
+
+        run_cli("load test_cli_uni")
+        self.assertEqual(len(transactions), 1)
+
+    def test_cli_load_without_name_lists_saves(self):
+        """Test load with no argument lists the saves instead of prompting"""
+        save_data("test_cli_listed")
+
+        with patch("builtins.input", side_effect=AssertionError("load prompted for input")):
+            output = run_cli("load")
+        self.assertIn("Available saves:", output)
+        self.assertIn("test_cli_listed", output)
+
     def test_list_save_files(self):
         """Test listing save files"""
         # Create test saves
@@ -318,6 +613,10 @@ class TestBudgetTracker(unittest.TestCase):
         self.assertIn("test_save1", saves)
         self.assertIn("test_save2", saves)
 
+        # A save made right after listing shows up in the next listing
+        save_data("test_save3")
+        self.assertIn("test_save3", list_save_files())
+
     def test_edge_cases(self):
         """Test various edge cases"""
         # Empty category name
@@ -349,18 +648,25 @@ class TestBudgetTracker(unittest.TestCase):
             is_rec=True, rec_interval="yearly"
         )
 
-        # Check 2021 (not a leap year)
-        bal = calc_proj_bal(date(2021, 2, 28))
+        # Check 2021 (not a leap year, falls on Feb 28)
+        bal = calc_proj_bal(date(2021, 2, 27))
         self.assertEqual(bal, 100.0)
+        bal = calc_proj_bal(date(2021, 2, 28))
+        self.assertEqual(bal, 200.0)
 
-        # Check 2024 (leap year)
+        # Check 2024 (leap year, back on Feb 29)
+        bal = calc_proj_bal(date(2024, 2, 28))
+        self.assertEqual(bal, 400.0)
         bal = calc_proj_bal(date(2024, 2, 29))
-        self.assertEqual(bal, 200.0)
+        self.assertEqual(bal, 500.0)
+
+        # 2100 is not a leap year
+        bal = calc_proj_bal(date(2100, 2, 28))
+        self.assertEqual(bal, 8100.0)
 
     def test_cleanup(self):
         """Clean up any test files"""
-        for f in SAVES_DIR.glob("test_*.json"):
-            f.unlink()
+        remove_test_saves()
 
 
 if __name__ == "__main__":